@@ -1,19 +1,17 @@
 # Author(s): Dr. Patrick Lemoine
 
 import os
+import re
 import sys
 import math
-import time
+import operator
 import threading
+import numpy as np
+from queue import Queue, Empty
+from functools import reduce
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'YoctoLib.python'))
 
-try:
-    import pynmea2
-except ImportError:
-    print("Please install pynmea2: pip install pynmea2")
-    sys.exit(1)
-
 # Try importing Yoctopuce libraries
 try:
     from yocto_api import *
@@ -22,6 +20,18 @@ try:
 except ImportError:
     YOCTO_AVAILABLE = False
 
+# Try importing Numba to compile the position math
+try:
+    from numba import njit, vectorize
+except ImportError:
+    def njit(*args, **kwargs):
+        # Plain Python fallback: keep the decorated function unchanged
+        return lambda func: func
+
+    def vectorize(*args, **kwargs):
+        # Plain Python fallback: the kernels only use arithmetic, so they broadcast over ndarrays
+        return lambda func: func
+
 def usage():
     scriptname = os.path.basename(sys.argv[0])
     print("Usage:")
@@ -34,65 +44,160 @@ def usage():
 def die(msg):
     sys.exit(msg + ' (check USB cable or serial port)')
 
-def satellite_position(receiver_lat, receiver_lon, elevation_deg, azimuth_deg):
-    earth_radius_km = 6371.0
-    satellite_altitude_km = 20200.0  # typical GPS satellite altitude
+# Spherical model constants (km), folded into the compiled kernels
+_EARTH_R = 6371.0
+_SAT_ALT = 20200.0  # typical GPS satellite altitude
+_R_SAT = _EARTH_R + _SAT_ALT
+_R_REC = _EARTH_R  # ignoring receiver altitude for simplicity
 
+@njit('UniTuple(f8,7)(f8,f8)', cache=True, fastmath=True)
+def receiver_frame(receiver_lat, receiver_lon):
+    """
+    Receiver invariants shared by all satellites of a fix:
+    (x_rec, y_rec, z_rec, sin_lat, cos_lat, sin_lon, cos_lon).
+    """
     lat_rad = math.radians(receiver_lat)
     lon_rad = math.radians(receiver_lon)
-    el_rad = math.radians(elevation_deg)
-    az_rad = math.radians(azimuth_deg)
 
-    r_sat = earth_radius_km + satellite_altitude_km
-    r_rec = earth_radius_km  # ignoring receiver altitude for simplicity
+    sin_lat = math.sin(lat_rad)
+    cos_lat = math.cos(lat_rad)
+    sin_lon = math.sin(lon_rad)
+    cos_lon = math.cos(lon_rad)
+
+    x_rec = _R_REC * cos_lat * cos_lon
+    y_rec = _R_REC * cos_lat * sin_lon
+    z_rec = _R_REC * sin_lat
 
-    x_rec = r_rec * math.cos(lat_rad) * math.cos(lon_rad)
-    y_rec = r_rec * math.cos(lat_rad) * math.sin(lon_rad)
-    z_rec = r_rec * math.sin(lat_rad)
+    return x_rec, y_rec, z_rec, sin_lat, cos_lat, sin_lon, cos_lon
 
-    x_dir = math.cos(el_rad) * math.cos(az_rad)
-    y_dir = math.cos(el_rad) * math.sin(az_rad)
-    z_dir = math.sin(el_rad)
+# Element-wise ENU direction -> ECEF satellite coordinate kernels, one ufunc per axis
+# (arguments: x_dir, y_dir, z_dir, rec, sin_lat, cos_lat, sin_lon, cos_lon)
+@vectorize(['f8(f8,f8,f8,f8,f8,f8,f8,f8)'], target='cpu', cache=True, fastmath=True)
+def _sat_x(x_dir, y_dir, z_dir, x_rec, sin_lat, cos_lat, sin_lon, cos_lon):
+    return _R_SAT * (-sin_lon * x_dir - sin_lat * cos_lon * y_dir + cos_lat * cos_lon * z_dir) + x_rec
 
-    x_sat = x_rec + r_sat * (-math.sin(lon_rad) * x_dir - math.sin(lat_rad) * math.cos(lon_rad) * y_dir + math.cos(lat_rad) * math.cos(lon_rad) * z_dir)
-    y_sat = y_rec + r_sat * (math.cos(lon_rad) * x_dir - math.sin(lat_rad) * math.sin(lon_rad) * y_dir + math.cos(lat_rad) * math.sin(lon_rad) * z_dir)
-    z_sat = z_rec + r_sat * (math.cos(lat_rad) * y_dir + math.sin(lat_rad) * z_dir)
+@vectorize(['f8(f8,f8,f8,f8,f8,f8,f8,f8)'], target='cpu', cache=True, fastmath=True)
+def _sat_y(x_dir, y_dir, z_dir, y_rec, sin_lat, cos_lat, sin_lon, cos_lon):
+    return _R_SAT * (cos_lon * x_dir - sin_lat * sin_lon * y_dir + cos_lat * sin_lon * z_dir) + y_rec
 
-    hyp = math.sqrt(x_sat * x_sat + y_sat * y_sat)
-    lat_sat = math.degrees(math.atan2(z_sat, hyp))
-    lon_sat = math.degrees(math.atan2(y_sat, x_sat))
-    alt_sat = math.sqrt(x_sat * x_sat + y_sat * y_sat + z_sat * z_sat) - earth_radius_km
+@vectorize(['f8(f8,f8,f8,f8,f8,f8,f8,f8)'], target='cpu', cache=True, fastmath=True)
+def _sat_z(x_dir, y_dir, z_dir, z_rec, sin_lat, cos_lat, sin_lon, cos_lon):
+    return _R_SAT * (cos_lat * y_dir + sin_lat * z_dir) + z_rec
+
+def satellite_position_batch(frame, elevation_deg, azimuth_deg):
+    """
+    Satellite positions for a whole fix: frame comes from receiver_frame, elevation_deg
+    and azimuth_deg are arrays, returns arrays (lat_sat, lon_sat, alt_sat).
+    """
+    x_rec, y_rec, z_rec, sin_lat, cos_lat, sin_lon, cos_lon = frame
+    el_rad = np.deg2rad(elevation_deg, dtype=np.float64)
+    az_rad = np.deg2rad(azimuth_deg, dtype=np.float64)
+
+    cos_el = np.cos(el_rad)
+    x_dir = cos_el * np.cos(az_rad)
+    y_dir = cos_el * np.sin(az_rad)
+    z_dir = np.sin(el_rad)
+
+    x_sat = _sat_x(x_dir, y_dir, z_dir, x_rec, sin_lat, cos_lat, sin_lon, cos_lon)
+    y_sat = _sat_y(x_dir, y_dir, z_dir, y_rec, sin_lat, cos_lat, sin_lon, cos_lon)
+    z_sat = _sat_z(x_dir, y_dir, z_dir, z_rec, sin_lat, cos_lat, sin_lon, cos_lon)
+
+    hyp = np.hypot(x_sat, y_sat)
+    lat_sat = np.degrees(np.arctan2(z_sat, hyp))
+    lon_sat = np.degrees(np.arctan2(y_sat, x_sat))
+    alt_sat = np.hypot(hyp, z_sat) - _EARTH_R
 
     return lat_sat, lon_sat, alt_sat
 
+# Constellation names indexed by YGps satType
+_SAT_TYPES = ("GPS", "GLONASS", "GALILEO")
+_N_SAT_TYPES = len(_SAT_TYPES)
+
+# Per-PRN angle tables: satellite numbers index int16 arrays (2 bytes per angle,
+# no boxed ints), the int16 minimum marks "no angles"
+_MAX_PRN = 1024  # covers extended-NMEA IDs such as Galileo 301-336 and BeiDou 401+
+_NO_ANGLE = np.iinfo(np.int16).min
+
+def new_angle_tables():
+    """Return empty per-PRN (sat_elev, sat_az) int16 arrays."""
+    return np.full(_MAX_PRN, _NO_ANGLE, dtype=np.int16), np.full(_MAX_PRN, _NO_ANGLE, dtype=np.int16)
+
+# NMEA GSV sentence from any talker ($GPGSV, $GLGSV, $GAGSV, ...)
+_GSV_RE = re.compile(r'\$[A-Z]{2}GSV,')
+
 def parse_gsv(nmea_lines):
     """
-    Parse NMEA GSV sentences and return dict {satellite_number: (elevation, azimuth)}.
+    Parse NMEA GSV sentences and return per-PRN arrays (sat_elev, sat_az),
+    where sat_elev[satellite_number] is _NO_ANGLE for satellites not reported.
     """
-    sat_angles = {}
+    sat_elev, sat_az = new_angle_tables()
     for line in nmea_lines:
-        if not line.startswith('$') or 'GSV' not in line:
+        if not _GSV_RE.match(line):
             continue
-        fields = line.strip().split(',')
-        try:
-            total_msgs = int(fields[1])
-            msg_num = int(fields[2])
-            sats_in_view = int(fields[3])
-        except (ValueError, IndexError):
+        # Trailing checksum/CRLF only ever lands in the unused SNR field
+        fields = line.split(',')
+        # Header: total_msgs, msg_num, sats_in_view
+        if len(fields) < 4 or not (fields[1].isdigit() and fields[2].isdigit() and fields[3].isdigit()):
             continue
 
-        sat_data_start = 4
-        while sat_data_start + 3 < len(fields):
-            try:
-                sat_num = int(fields[sat_data_start])
-                elevation = int(fields[sat_data_start + 1])
-                azimuth = int(fields[sat_data_start + 2])
-                # SNR = fields[sat_data_start + 3] (not used)
-                sat_angles[sat_num] = (elevation, azimuth)
-            except ValueError:
-                pass
-            sat_data_start += 4
-    return sat_angles
+        store_gsv_angles(fields, sat_elev, sat_az)
+    return sat_elev, sat_az
+
+_SIGNS = ('-', '+', b'-', b'+')
+
+def _is_int_field(field):
+    """True if a str or bytes NMEA field is an integer with an optional sign, as int() accepts it."""
+    if field[:1] in _SIGNS:
+        field = field[1:]
+    return field.isdigit()
+
+def store_gsv_angles(fields, sat_elev, sat_az):
+    """
+    Store the elevation/azimuth of the satellites of one split GSV sentence
+    (str or bytes fields) into the per-PRN arrays.
+    """
+    # Satellite info starts at index 4, each satellite uses 4 fields (SNR not used)
+    for sat_num, elevation, azimuth, _snr in zip(fields[4::4], fields[5::4], fields[6::4], fields[7::4]):
+        if _is_int_field(sat_num) and _is_int_field(elevation) and _is_int_field(azimuth):
+            prn = int(sat_num)
+            elev = int(elevation)
+            az = int(azimuth)
+            # Out of range values would not fit the int16 tables
+            if 0 <= prn < _MAX_PRN and -90 <= elev <= 90 and 0 <= az < 360:
+                sat_elev[prn] = elev
+                sat_az[prn] = az
+
+def nmea_checksum_ok(sentence):
+    """
+    Check the '*hh' checksum of a raw NMEA sentence (bytes); sentences without one are accepted.
+    """
+    star = sentence.rfind(b'*')
+    if star < 0:
+        return True
+    try:
+        return reduce(operator.xor, sentence[1:star], 0) == int(sentence[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+
+def parse_gga(fields):
+    """
+    Return (gps_qual, lat, lon, alt) from the bytes fields of a GGA sentence,
+    with lat/lon in signed degrees and alt in meters.
+    """
+    gps_qual = int(fields[6])
+    if gps_qual == 0:
+        return gps_qual, None, None, None
+
+    # ddmm.mmmm / dddmm.mmmm
+    lat = float(fields[2][:2]) + float(fields[2][2:]) / 60.0
+    lon = float(fields[4][:3]) + float(fields[4][3:]) / 60.0
+    if fields[3] == b'S':
+        lat = -lat
+    if fields[5] == b'W':
+        lon = -lon
+    alt = float(fields[9])
+
+    return gps_qual, lat, lon, alt
 
 def run_yocto_gps(target):
     errmsg = YRefParam()
@@ -113,46 +218,101 @@ def run_yocto_gps(target):
 
     print("Using Yocto-GPS device:", target)
 
+    last_fix = None
+    frame = None
+
     while gps.isOnline():
         if gps.get_isFixed() != YGps.ISFIXED_TRUE:
             print("Waiting for GPS fix...")
             YAPI.Sleep(2000)
             continue
 
+        # Fetch all GPS attributes in one USB transaction, valid for this 5 s cycle;
+        # the getters below, including get_satelliteInfo, then read from the cache
+        gps.load(5000)
+
         lat = gps.get_latitude()
         lon = gps.get_longitude()
         alt = gps.get_altitude()
         print(f"Fixed position: Latitude={lat:.6f}°, Longitude={lon:.6f}°, Altitude={alt:.1f} m")
 
+        # Receiver frame only changes when the fix moves
+        if (lat, lon) != last_fix:
+            frame = receiver_frame(lat, lon)
+            last_fix = (lat, lon)
+
         nmea_messages = gps.get_nmeaMessages()
-        sat_angles = parse_gsv(nmea_messages)
+        sat_elev, sat_az = parse_gsv(nmea_messages)
 
         satCount = gps.get_satelliteCount()
         print(f"Satellites visible: {satCount}")
 
-        for i in range(satCount):
-            satInfo = gps.get_satelliteInfo(i)
+        satInfos = [gps.get_satelliteInfo(i) for i in range(satCount)]
+
+        # Compute the positions of all satellites with known angles in one batch
+        # (out of range PRNs have no angles, whatever the clipped lookup finds)
+        prns = np.fromiter((satInfo.get_satNumber() for satInfo in satInfos), dtype=np.intp, count=satCount)
+        in_range = (prns >= 0) & (prns < _MAX_PRN)
+        prns[~in_range] = 0
+        valid = in_range & (sat_elev[prns] != _NO_ANGLE)
+        elevations = sat_elev[prns[valid]]
+        azimuths = sat_az[prns[valid]]
+        lat_sats, lon_sats, alt_sats = satellite_position_batch(frame, elevations, azimuths)
+
+        # Collect the report and write it to stdout in one go
+        lines = []
+        k = 0
+        for i, satInfo in enumerate(satInfos):
             satType = satInfo.get_satType()
-            satTypeStr = {0:"GPS", 1:"GLONASS", 2:"GALILEO"}.get(satType, "UNKNOWN")
+            satTypeStr = _SAT_TYPES[satType] if 0 <= satType < _N_SAT_TYPES else "UNKNOWN"
             satID = satInfo.get_satNumber()
             signal = satInfo.get_signalStrength()
             used = satInfo.get_inUse()
 
-            elevation_deg, azimuth_deg = sat_angles.get(satID, (None, None))
-
-            if elevation_deg is None or azimuth_deg is None:
-                print(f"Satellite {satID}: elevation/azimuth angles not available")
+            if not valid[i]:
+                lines.append(f"Satellite {satID}: elevation/azimuth angles not available")
             else:
-                lat_sat, lon_sat, alt_sat = satellite_position(lat, lon, elevation_deg, azimuth_deg)
-                print(f"Satellite {i+1}: Type={satTypeStr} ID={satID} Signal={signal} UsedInFix={used}")
-                print(f"  Elevation={elevation_deg}°, Azimuth={azimuth_deg}°")
-                print(f"  Approximate satellite position: Latitude={lat_sat:.6f}°, Longitude={lon_sat:.6f}°, Altitude={alt_sat*1000:.0f} m")
-
-        print("-----")
+                elevation_deg, azimuth_deg = elevations[k], azimuths[k]
+                lat_sat, lon_sat, alt_sat = lat_sats[k], lon_sats[k], alt_sats[k]
+                k += 1
+                lines.append(f"Satellite {i+1}: Type={satTypeStr} ID={satID} Signal={signal} UsedInFix={used}")
+                lines.append(f"  Elevation={elevation_deg}°, Azimuth={azimuth_deg}°")
+                lines.append(f"  Approximate satellite position: Latitude={lat_sat:.6f}°, Longitude={lon_sat:.6f}°, Altitude={alt_sat*1000:.0f} m")
+
+        lines.append("-----")
+        sys.stdout.write("\n".join(lines) + "\n")
         YAPI.Sleep(5000)
 
     YAPI.FreeAPI()
 
+def read_nmea_sentences(ser):
+    """
+    Yield the NMEA sentences (bytes, surrounding whitespace stripped) received on
+    a serial port, reading whatever is pending into a single reusable buffer.
+    """
+    buf = bytearray()
+    while True:
+        buf.extend(ser.read(max(1, ser.in_waiting)))
+        eol = buf.find(b'\n')
+        while eol >= 0:
+            sentence = bytes(buf[:eol]).strip()
+            del buf[:eol + 1]
+            yield sentence
+            eol = buf.find(b'\n')
+
+def serial_reader(ser, sentence_queue):
+    """
+    Producer thread: queue the NMEA sentences read from the serial port,
+    then None once the port fails or is closed.
+    """
+    try:
+        for sentence in read_nmea_sentences(ser):
+            sentence_queue.put(sentence)
+    except OSError:
+        pass
+    finally:
+        sentence_queue.put(None)
+
 def run_system_gps(serial_port, baudrate=4800):
     import serial
 
@@ -165,55 +325,64 @@ def run_system_gps(serial_port, baudrate=4800):
     receiver_lat = None
     receiver_lon = None
     receiver_alt = None
-    sat_angles = {}
+    last_fix = None
+    frame = None
+    sat_elev, sat_az = new_angle_tables()
 
     print("Reading system GPS NMEA sentences...")
 
+    # Serial reads run on their own thread so a slow console never stalls the UART
+    sentence_queue = Queue(maxsize=64)
+    threading.Thread(target=serial_reader, args=(ser, sentence_queue), daemon=True).start()
+
     while True:
         try:
-            line = ser.readline().decode('ascii', errors='ignore').strip()
-            if not line:
+            # Timed wait: an untimed Queue.get() cannot be interrupted by Ctrl+C on Windows
+            try:
+                line = sentence_queue.get(timeout=0.5)
+            except Empty:
                 continue
-            if not line.startswith('$'):
+            if line is None:
+                print("Serial port closed")
+                break
+            if not line.startswith(b'$') or not nmea_checksum_ok(line):
                 continue
 
-            msg = pynmea2.parse(line)
-
-            if isinstance(msg, pynmea2.GGA):
-                if msg.gps_qual > 0:
-                    receiver_lat = msg.latitude if msg.lat_dir == 'N' else -msg.latitude
-                    receiver_lon = msg.longitude if msg.lon_dir == 'E' else -msg.longitude
-                    receiver_alt = msg.altitude  # meters
+            # Only GGA and GSV are used: read their fields directly from the raw sentence
+            sentence_type = line[3:6]
+
+            if sentence_type == b'GGA':
+                gps_qual, lat, lon, alt = parse_gga(line.split(b','))
+                if gps_qual > 0:
+                    receiver_lat = lat
+                    receiver_lon = lon
+                    receiver_alt = alt  # meters
+                    if (receiver_lat, receiver_lon) != last_fix:
+                        frame = receiver_frame(receiver_lat, receiver_lon)
+                        last_fix = (receiver_lat, receiver_lon)
                     print(f"Fix: Lat={receiver_lat:.6f}, Lon={receiver_lon:.6f}, Alt={receiver_alt:.1f} m")
                 else:
                     print("No GPS fix yet")
 
-            elif isinstance(msg, pynmea2.GSV):
+            elif sentence_type == b'GSV':
                 # Update satellite angles
-                for i in range(msg.num_sv_in_view):
-                    fields = line.split(',')
-                    # Satellite info starts at index 4, each satellite uses 4 fields
-                    for sat_idx in range(4):
-                        base_idx = 4 + sat_idx * 4
-                        if base_idx + 3 < len(fields):
-                            try:
-                                sat_num = int(fields[base_idx])
-                                elevation = int(fields[base_idx + 1])
-                                azimuth = int(fields[base_idx + 2])
-                                # snr = fields[base_idx + 3]
-                                sat_angles[sat_num] = (elevation, azimuth)
-                            except ValueError:
-                                pass
+                store_gsv_angles(line.split(b','), sat_elev, sat_az)
 
                 if receiver_lat is not None and receiver_lon is not None:
-                    print(f"Satellites visible: {len(sat_angles)}")
-                    for sat_num, (elev, az) in sat_angles.items():
-                        lat_sat, lon_sat, alt_sat = satellite_position(receiver_lat, receiver_lon, elev, az)
-                        print(f"Satellite {sat_num}: Elevation={elev}°, Azimuth={az}°")
-                        print(f"  Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m")
-            time.sleep(0.1)
-
-        except pynmea2.ParseError:
+                    prns = np.where(sat_elev != _NO_ANGLE)[0]
+                    elevations = sat_elev[prns]
+                    azimuths = sat_az[prns]
+                    lat_sats, lon_sats, alt_sats = satellite_position_batch(frame, elevations, azimuths)
+                    lines = [f"Satellites visible: {len(prns)}"]
+                    for k, sat_num in enumerate(prns):
+                        elev, az = elevations[k], azimuths[k]
+                        lat_sat, lon_sat, alt_sat = lat_sats[k], lon_sats[k], alt_sats[k]
+                        lines.append(f"Satellite {sat_num}: Elevation={elev}°, Azimuth={az}°")
+                        lines.append(f"  Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m")
+                    sys.stdout.write("\n".join(lines) + "\n")
+
+        except (ValueError, IndexError, OverflowError):
+            # Malformed sentence
             continue
         except KeyboardInterrupt:
             print("Exiting system GPS reader")
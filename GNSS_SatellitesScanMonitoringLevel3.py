@@ -13,11 +13,15 @@
 # adapting its data parsing accordingly.
 
 import os
+import re
 import sys
 import math
 import time
+import select
+import operator
 import threading
 import numpy as np
+from functools import reduce
 from vpython import *
 from datetime import datetime, timedelta
 
@@ -37,6 +41,14 @@ try:
 except ImportError:
     YOCTO_AVAILABLE = False
 
+# Try importing Numba to compile the position math
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        # Plain Python fallback: keep the decorated function unchanged
+        return lambda func: func
+
 # Global variables for filtering
 SHOW_GPS = True
 SHOW_GLONASS = True
@@ -44,6 +56,27 @@ SHOW_GALILEO = True
 MIN_SIGNAL_STRENGTH = 0  # Minimum signal strength to display (0-100)
 HIGHLIGHT_USED_IN_FIX = True
 
+# Constellations indexed by satellite type (0: GPS, 1: GLONASS, 2: GALILEO)
+_SAT_TYPE_NAME = ("GPS", "GLONASS", "GALILEO")
+_BASE_COLOR = (vector(0.8, 0.4, 0.0),  # GPS: orange
+               vector(0.0, 0.6, 0.8),  # GLONASS: blue
+               vector(0.0, 0.8, 0.2))  # GALILEO: green
+_ORBIT_COLOR = (vector(0.8, 0.4, 0.0, 0.5),  # GPS: orange with transparency
+                vector(0.0, 0.6, 0.8, 0.5),  # GLONASS: blue with transparency
+                vector(0.0, 0.8, 0.2, 0.5))  # GALILEO: green with transparency
+_DEFAULT_COLOR = vector(0.7, 0.7, 0.7)  # Default: gray
+_DEFAULT_ORBIT_COLOR = vector(0.7, 0.7, 0.7, 0.5)
+_USED_COLOR = vector(1.0, 1.0, 0.0)  # Yellow for satellites used in fix
+
+_MAX_SATS = 64  # satellite slots allocated up front for the 3D view
+_FRAME_TIME = 1.0 / 30  # 3D refresh budget (30 FPS)
+
+# Orbit tracks: cos/sin of the 51 angles around the great circle, as (51, 1) columns
+_ORBIT_REBUILD_DEG = 2.0  # angular drift before a track is recomputed
+_ORBIT_ANG = np.linspace(0, 2 * np.pi, 51)
+_C = np.cos(_ORBIT_ANG)[:, None]
+_S = np.sin(_ORBIT_ANG)[:, None]
+
 def usage():
     scriptname = os.path.basename(sys.argv[0])
     print("Usage:")
@@ -51,68 +84,122 @@ def usage():
     print(f"{scriptname} any")
     print(f"{scriptname} --system-gps <serial_port>")
     print(f"{scriptname} --3d <target>  # Enable 3D visualization")
+    print(f"{scriptname} --3d --verbose <target>  # 3D visualization with the per-satellite console report")
     sys.exit()
 
 def die(msg):
     sys.exit(msg + ' (check USB cable or serial port)')
 
-def satellite_position(receiver_lat, receiver_lon, elevation_deg, azimuth_deg):
-    earth_radius_km = 6371.0
-    satellite_altitude_km = 20200.0  # typical GPS satellite altitude
+@njit('UniTuple(f8,2)(f8)', cache=True, fastmath=True)
+def _sincos(x):
+    """Return (sin(x), cos(x)) of one angle in radians"""
+    return math.sin(x), math.cos(x)
+
+# Degree -> radian factor
+_D2R = math.pi / 180.0
+
+# WGS84 ellipsoid (km)
+_WGS84_A = 6378.137
+_WGS84_E2 = 6.69437999014e-3
+_WGS84_B = _WGS84_A * math.sqrt(1.0 - _WGS84_E2)
+_WGS84_EP2 = _WGS84_E2 / (1.0 - _WGS84_E2)
+
+# Receiver to satellite distance of the simplified model: mean Earth radius + typical GPS satellite altitude
+_SAT_RANGE_KM = 6371.0 + 20200.0
+
+@njit('Tuple((UniTuple(f8,9),f8,f8,f8))(f8,f8,f8)', cache=True, fastmath=True)
+def _receiver_frame(receiver_lat, receiver_lon, receiver_alt):
+    """Return (ENU -> ECEF rotation as a flat row-major 9-tuple, x_rec, y_rec, z_rec), computed once per fix"""
+    sin_lat, cos_lat = _sincos(receiver_lat * _D2R)
+    sin_lon, cos_lon = _sincos(receiver_lon * _D2R)
+    
+    rot = (-sin_lon, -sin_lat * cos_lon, cos_lat * cos_lon,
+           cos_lon, -sin_lat * sin_lon, cos_lat * sin_lon,
+           0.0, cos_lat, sin_lat)
+    
+    # Geodetic -> ECEF on the WGS84 ellipsoid, receiver altitude given in meters
+    n = _WGS84_A / math.sqrt(1.0 - _WGS84_E2 * sin_lat * sin_lat)
+    h = receiver_alt / 1000.0
+    x_rec = (n + h) * cos_lat * cos_lon
+    y_rec = (n + h) * cos_lat * sin_lon
+    z_rec = (n * (1.0 - _WGS84_E2) + h) * sin_lat
+    
+    return rot, x_rec, y_rec, z_rec
+
+def satellite_positions_batch(frame, elev_deg_arr, az_deg_arr):
+    """Satellite positions of a fix: frame comes from _receiver_frame, return (lat_sat, lon_sat, alt_sat) arrays"""
+    rot, x_rec, y_rec, z_rec = frame
+    
+    # One np.sin and one np.cos over the stacked elevations and azimuths
+    angles = np.deg2rad(np.array([elev_deg_arr, az_deg_arr], dtype=np.float64))
+    (sin_el, sin_az), (cos_el, cos_az) = np.sin(angles), np.cos(angles)
     
-    lat_rad = math.radians(receiver_lat)
-    lon_rad = math.radians(receiver_lon)
-    el_rad = math.radians(elevation_deg)
-    az_rad = math.radians(azimuth_deg)
+    rec = np.array([[x_rec], [y_rec], [z_rec]])
     
-    r_sat = earth_radius_km + satellite_altitude_km
-    r_rec = earth_radius_km  # ignoring receiver altitude for simplicity
+    # ENU -> ECEF rotation applied to every direction at once
+    R = np.array(rot).reshape(3, 3)
     
-    x_rec = r_rec * math.cos(lat_rad) * math.cos(lon_rad)
-    y_rec = r_rec * math.cos(lat_rad) * math.sin(lon_rad)
-    z_rec = r_rec * math.sin(lat_rad)
+    dirs = np.stack([cos_el * cos_az,
+                     cos_el * sin_az,
+                     sin_el])
     
-    x_dir = math.cos(el_rad) * math.cos(az_rad)
-    y_dir = math.cos(el_rad) * math.sin(az_rad)
-    z_dir = math.sin(el_rad)
+    x_sat, y_sat, z_sat = rec + _SAT_RANGE_KM * (R @ dirs)
     
-    x_sat = x_rec + r_sat * (-math.sin(lon_rad) * x_dir - math.sin(lat_rad) * math.cos(lon_rad) * y_dir + math.cos(lat_rad) * math.cos(lon_rad) * z_dir)
-    y_sat = y_rec + r_sat * (math.cos(lon_rad) * x_dir - math.sin(lat_rad) * math.sin(lon_rad) * y_dir + math.cos(lat_rad) * math.sin(lon_rad) * z_dir)
-    z_sat = z_rec + r_sat * (math.cos(lat_rad) * y_dir + math.sin(lat_rad) * z_dir)
+    # ECEF -> WGS84 with Bowring's closed-form latitude (no iteration)
+    p = np.hypot(x_sat, y_sat)
+    t = np.arctan2(z_sat * _WGS84_A, p * _WGS84_B)
+    sin_t, cos_t = np.sin(t), np.cos(t)
+    lat = np.arctan2(z_sat + _WGS84_EP2 * _WGS84_B * sin_t ** 3,
+                     p - _WGS84_E2 * _WGS84_A * cos_t ** 3)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    n = _WGS84_A / np.sqrt(1.0 - _WGS84_E2 * sin_lat * sin_lat)
     
-    hyp = math.sqrt(x_sat * x_sat + y_sat * y_sat)
-    lat_sat = math.degrees(math.atan2(z_sat, hyp))
-    lon_sat = math.degrees(math.atan2(y_sat, x_sat))
-    alt_sat = math.sqrt(x_sat * x_sat + y_sat * y_sat + z_sat * z_sat) - earth_radius_km
+    lat_sat = np.degrees(lat)
+    lon_sat = np.degrees(np.arctan2(y_sat, x_sat))
+    alt_sat = p * cos_lat + z_sat * sin_lat - _WGS84_A * _WGS84_A / n
     
     return lat_sat, lon_sat, alt_sat
 
-def parse_gsv(nmea_lines):
-    """Parse NMEA GSV sentences and return dict {satellite_number: (elevation, azimuth)}."""
-    sat_angles = {}
-    for line in nmea_lines:
-        if not line.startswith('$') or 'GSV' not in line:
-            continue
-        fields = line.strip().split(',')
-        try:
-            total_msgs = int(fields[1])
-            msg_num = int(fields[2])
-            sats_in_view = int(fields[3])
-        except (ValueError, IndexError):
+# GSV sentence: (total messages, message number, body after the header fields)
+_GSV_BODY_RE = re.compile(rb'^\$[A-Z]{2}GSV,(\d+),(\d+),\d+(,[^*\r\n]*)', re.MULTILINE)
+
+def _is_int_field(field):
+    """True if a bytes NMEA field is an integer with an optional sign, as int() accepts it"""
+    if field[:1] in (b'-', b'+'):
+        field = field[1:]
+    return field.isdigit()
+
+def gsv_satellites(body):
+    """Return the (sat_num, elevation, azimuth, snr) int groups of one GSV body"""
+    # The body starts with a comma, then each satellite uses 4 fields
+    fields = body.split(b',')[1:]
+    groups = []
+    for sat_num, elevation, azimuth, snr in zip(fields[0::4], fields[1::4], fields[2::4], fields[3::4]):
+        # Each group is checked on its own: satellites without valid angles are skipped
+        if not (_is_int_field(sat_num) and _is_int_field(elevation) and _is_int_field(azimuth)):
             continue
-        
-        sat_data_start = 4
-        while sat_data_start + 3 < len(fields):
-            try:
-                sat_num = int(fields[sat_data_start])
-                elevation = int(fields[sat_data_start + 1])
-                azimuth = int(fields[sat_data_start + 2])
-                # SNR = fields[sat_data_start + 3] (not used)
-                sat_angles[sat_num] = (elevation, azimuth)
-            except ValueError:
-                pass
-            sat_data_start += 4
-    return sat_angles
+        sat_num, elevation, azimuth = int(sat_num), int(elevation), int(azimuth)
+        if 0 <= sat_num <= 999 and -90 <= elevation <= 90 and 0 <= azimuth < 360:
+            # A missing SNR reads as 0
+            groups.append((sat_num, elevation, azimuth, min(int(snr), 99) if snr.isdigit() else 0))
+    return groups
+
+def parse_gsv(nmea_lines):
+    """Parse NMEA GSV sentences and return int16 arrays (sat_nums, elevations, azimuths, snrs)."""
+    text = '\n'.join(nmea_lines).encode('ascii', errors='ignore')
+    sats = np.array([group for _total, _num, body in _GSV_BODY_RE.findall(text)
+                     for group in gsv_satellites(body)], dtype=np.int16).reshape(-1, 4)
+    return sats[:, 0], sats[:, 1], sats[:, 2], sats[:, 3]
+
+def nmea_checksum_ok(sentence):
+    """Check the '*hh' checksum of a raw NMEA sentence (bytes); sentences without one are accepted."""
+    star = sentence.rfind(b'*')
+    if star < 0:
+        return True
+    try:
+        return reduce(operator.xor, sentence[1:star], 0) == int(sentence[star + 1:star + 3], 16)
+    except ValueError:
+        return False
 
 def create_sky_display():
     """Create 3D interactive celestial sphere with cardinal points"""
@@ -167,16 +254,14 @@ def create_sky_display():
               shaftwidth=0.5,
               color=point["color"])
     
-    # Reference stars
-    for _ in range(200):
-        pos = vector(np.random.uniform(-100, 100),
-                     np.random.uniform(-100, 100),
-                     np.random.uniform(-100, 100))
-        if mag(pos) > 95:  # Only place stars on sphere surface
-            sphere(pos=pos, radius=0.3, color=color.white, emissive=True)
+    # Reference stars, drawn uniformly on the sphere surface (normalized Gaussian samples)
+    star_pos = np.random.randn(200, 3)
+    star_pos *= 100 / np.linalg.norm(star_pos, axis=1, keepdims=True)
+    for x, y, z in star_pos.tolist():
+        sphere(pos=vector(x, y, z), radius=0.3, color=color.white, emissive=True)
     
-    # Store orbit tracks
-    scene.orbit_tracks = {}
+    # Satellite slots, handles and orbit tracks
+    _init_sat_slots(scene)
     
     return scene
 
@@ -200,38 +285,23 @@ def toggle_highlight_used(checkbox):
     global HIGHLIGHT_USED_IN_FIX
     HIGHLIGHT_USED_IN_FIX = checkbox.checked
 
-def should_display_satellite(sat_type, signal_strength, used_in_fix):
-    """Determine if satellite should be displayed based on filter settings"""
-    # Check constellation filter
-    if sat_type == 0 and not SHOW_GPS:
-        return False
-    if sat_type == 1 and not SHOW_GLONASS:
-        return False
-    if sat_type == 2 and not SHOW_GALILEO:
-        return False
+def should_display_satellites(sat_types, signal_strengths):
+    """Boolean mask of the satellites to display based on filter settings"""
+    # Check constellation filter (unknown constellations are always shown)
+    shown_types = np.array([SHOW_GPS, SHOW_GLONASS, SHOW_GALILEO, True])
+    known = (sat_types >= 0) & (sat_types < 3)
+    mask = shown_types[np.where(known, sat_types, 3)]
     
     # Check signal strength
-    if signal_strength < MIN_SIGNAL_STRENGTH:
-        return False
-    
-    return True
+    return mask & (signal_strengths >= MIN_SIGNAL_STRENGTH)
 
 def get_satellite_color(sat_type, signal_strength, used_in_fix):
     """Determine satellite color based on type and whether it's used in fix"""
-    # Base colors for different constellations
-    base_colors = {
-        0: vector(0.8, 0.4, 0.0),  # GPS: orange
-        1: vector(0.0, 0.6, 0.8),  # GLONASS: blue
-        2: vector(0.0, 0.8, 0.2),  # GALILEO: green
-    }
-    
-    base_color = base_colors.get(sat_type, vector(0.7, 0.7, 0.7))  # Default: gray
-    
     # Highlight satellites used in fix
     if HIGHLIGHT_USED_IN_FIX and used_in_fix:
-        return vector(1.0, 1.0, 0.0)  # Yellow for satellites used in fix
+        return _USED_COLOR
     
-    return base_color
+    return _BASE_COLOR[sat_type] if 0 <= sat_type < 3 else _DEFAULT_COLOR
 
 def get_satellite_size(signal_strength):
     """Determine satellite size based on signal strength"""
@@ -242,146 +312,212 @@ def get_satellite_size(signal_strength):
         return min_size
     return min_size + (max_size - min_size) * (signal_strength / 100.0)
 
+def _init_sat_slots(scene, capacity=_MAX_SATS):
+    """Allocate the per-slot satellite arrays and handle lists of the 3D view"""
+    scene._id_to_slot = {}  # satellite id -> slot index
+    scene._sat_visible = np.zeros(capacity, dtype=bool)
+    scene._pos_buf = np.zeros((capacity, 3))  # sphere positions, one row per slot
+    scene._spheres = []
+    scene._labels = []
+    scene._orbit_curves = []
+    scene._prev = []  # last assigned (pos, color, radius, label key)
+
+def _new_sat_slot(scene, sat_id):
+    """Return a free slot for sat_id, doubling the arrays when they are full"""
+    slot = len(scene._id_to_slot)
+    if slot == len(scene._sat_visible):
+        for name in ('_sat_visible', '_pos_buf'):
+            arr = getattr(scene, name)
+            grown = np.zeros((2 * len(arr),) + arr.shape[1:], dtype=arr.dtype)
+            grown[:len(arr)] = arr
+            setattr(scene, name, grown)
+    scene._id_to_slot[sat_id] = slot
+    scene._spheres.append(None)
+    scene._labels.append(None)
+    scene._orbit_curves.append(None)
+    scene._prev.append(None)
+    return slot
+
 def update_satellites(scene, satellites_data):
     """Update satellite positions in the 3D view"""
-    if not hasattr(scene, 'sat_objects'):
-        scene.sat_objects = {}
-    
-    # Track which satellites are still visible
-    visible_sats = set()
+    if not hasattr(scene, '_id_to_slot'):
+        _init_sat_slots(scene)
+    
+    sat_types = np.array([sat.get("type", 0) for sat in satellites_data], dtype=np.int64)  # Default to GPS
+    signals = np.array([sat.get("signal", 50) for sat in satellites_data], dtype=np.int64)  # Default to 50
+    elevs = np.array([sat["elevation"] for sat in satellites_data], dtype=np.float64)
+    azims = np.array([sat["azimuth"] for sat in satellites_data], dtype=np.float64)
+    
+    # Apply filters
+    shown = should_display_satellites(sat_types, signals)
+    
+    # One slot lookup per satellite, satellites to display get a slot on first sight
+    id_to_slot = scene._id_to_slot
+    slots = []
+    for k, sat in enumerate(satellites_data):
+        slot = id_to_slot.get(sat["id"], -1)
+        if slot < 0 and shown[k]:
+            slot = _new_sat_slot(scene, sat["id"])
+        slots.append(slot)
+    
+    # Convert spherical coordinates to Cartesian for all displayed satellites at once
+    rows = np.flatnonzero(shown)
+    angles = np.radians([elevs[rows], azims[rows]])
+    (sin_elev, sin_azim), (cos_elev, cos_azim) = np.sin(angles), np.cos(angles)
+    pos_buf = scene._pos_buf
+    pos_buf[np.array(slots, dtype=np.intp)[rows]] = 100 * np.stack([cos_elev * sin_azim,
+                                                                    sin_elev,
+                                                                    cos_elev * cos_azim], axis=1)
+    positions = pos_buf[:len(id_to_slot)].tolist()
+    
+    spheres = scene._spheres
+    labels = scene._labels
+    prev = scene._prev
+    
+    # Visibility changes are collected during the loop and applied at the end
+    to_show = []
+    to_hide = []
     
     # Update or create satellites
-    for sat in satellites_data:
-        sat_id = sat["id"]
-        sat_type = sat.get("type", 0)  # Default to GPS if not specified
-        signal = sat.get("signal", 50)  # Default to 50 if not specified
-        used = sat.get("used", False)
+    for k, sat in enumerate(satellites_data):
+        slot = slots[k]
         
-        # Apply filters
-        if not should_display_satellite(sat_type, signal, used):
+        if not shown[k]:
             # Hide this satellite if it exists
-            if sat_id in scene.sat_objects:
-                scene.sat_objects[sat_id]['sphere'].visible = False
-                scene.sat_objects[sat_id]['label'].visible = False
-                if sat_id in scene.orbit_tracks:
-                    scene.orbit_tracks[sat_id].visible = False
+            if slot >= 0:
+                to_hide.append(slot)
             continue
         
-        visible_sats.add(sat_id)
-        
-        elev = math.radians(sat["elevation"])
-        azim = math.radians(sat["azimuth"])
-        
-        # Convert spherical coordinates to Cartesian
-        x = 100 * math.cos(elev) * math.sin(azim)
-        y = 100 * math.sin(elev)
-        z = 100 * math.cos(elev) * math.cos(azim)
+        sat_type = sat.get("type", 0)
+        signal = sat.get("signal", 50)
+        used_in_fix = sat.get("used", False)
+        pos_key = tuple(positions[slot])
+        label_key = (sat['name'], signal)
         
         # Determine satellite color and size
-        sat_color = get_satellite_color(sat_type, signal, used)
+        sat_color = get_satellite_color(sat_type, signal, used_in_fix)
         sat_size = get_satellite_size(signal)
+        color_key = (sat_color.x, sat_color.y, sat_color.z)
         
-        if sat_id in scene.sat_objects:
-            # Update existing satellite
-            scene.sat_objects[sat_id]['sphere'].pos = vector(x, y, z)
-            scene.sat_objects[sat_id]['sphere'].radius = sat_size
-            scene.sat_objects[sat_id]['sphere'].color = sat_color
-            scene.sat_objects[sat_id]['sphere'].visible = True
-            
-            scene.sat_objects[sat_id]['label'].pos = vector(x, y, z)
-            scene.sat_objects[sat_id]['label'].text = f"{sat['name']}\nSig: {signal}"
-            scene.sat_objects[sat_id]['label'].visible = True
+        if spheres[slot] is not None:
+            # Update existing satellite, only sending the attributes that changed
+            prev_pos, prev_color, prev_size, prev_label = prev[slot]
+            if pos_key != prev_pos:
+                sat_pos = vector(*pos_key)
+                spheres[slot].pos = sat_pos
+                labels[slot].pos = sat_pos
+            if sat_size != prev_size:
+                spheres[slot].radius = sat_size
+            if color_key != prev_color:
+                spheres[slot].color = sat_color
+            if label_key != prev_label:
+                labels[slot].text = f"{sat['name']}\nSig: {signal}"
             
             # Update orbit track
-            update_orbit_track(scene, sat_id, sat)
+            update_orbit_track(scene, slot, sat)
         else:
             # Create new satellite
-            sat_sphere = sphere(pos=vector(x, y, z),
-                               radius=sat_size,
-                               color=sat_color,
-                               emissive=True)
+            sat_pos = vector(*pos_key)
             
-            sat_label = label(pos=vector(x, y, z),
-                             text=f"{sat['name']}\nSig: {signal}",
-                             height=1.5,
-                             border=4,
-                             box=False)
+            spheres[slot] = sphere(pos=sat_pos,
+                                   radius=sat_size,
+                                   color=sat_color,
+                                   emissive=True)
             
-            scene.sat_objects[sat_id] = {
-                'sphere': sat_sphere,
-                'label': sat_label
-            }
+            labels[slot] = label(pos=sat_pos,
+                                 text=f"{sat['name']}\nSig: {signal}",
+                                 height=1.5,
+                                 border=4,
+                                 box=False)
+            scene._sat_visible[slot] = True
             
             # Create orbit track
-            create_orbit_track(scene, sat_id, sat)
+            create_orbit_track(scene, slot, sat)
+        
+        to_show.append(slot)
+        prev[slot] = (pos_key, color_key, sat_size, label_key)
     
     # Hide satellites that are no longer visible
-    for sat_id in list(scene.sat_objects.keys()):
-        if sat_id not in visible_sats:
-            scene.sat_objects[sat_id]['sphere'].visible = False
-            scene.sat_objects[sat_id]['label'].visible = False
-            if sat_id in scene.orbit_tracks:
-                scene.orbit_tracks[sat_id].visible = False
-
-def create_orbit_track(scene, sat_id, sat_data):
-    """Create a predicted orbit track for a satellite"""
-    # Get current position
-    elev = math.radians(sat_data["elevation"])
-    azim = math.radians(sat_data["azimuth"])
-    
-    # Generate orbit points (simplified circular orbit)
-    orbit_points = []
-    
-    # Create points for a simple circular orbit
-    # In a real implementation, you would use orbital mechanics and TLE data
-    # This is a simplified version that creates a circle on the celestial sphere
-    num_points = 50
+    visible = np.zeros(len(id_to_slot), dtype=bool)
+    visible[to_show] = True
+    to_hide.extend(np.flatnonzero(~visible).tolist())
+    
+    for slot in to_show:
+        if not scene._sat_visible[slot]:
+            spheres[slot].visible = True
+            labels[slot].visible = True
+            scene._sat_visible[slot] = True
+    
+    for slot in to_hide:
+        if scene._sat_visible[slot]:
+            spheres[slot].visible = False
+            labels[slot].visible = False
+            scene._sat_visible[slot] = False
+            if scene._orbit_curves[slot] is not None:
+                scene._orbit_curves[slot].visible = False
+
+def _orbit_basis(elevation_deg, azimuth_deg):
+    """Return the two unit vectors (u, v) spanning the orbit plane of a satellite"""
+    elev = elevation_deg * _D2R
+    azim = azimuth_deg * _D2R
     
     # Create a circle perpendicular to the current position vector
-    pos_vector = vector(
-        100 * math.cos(elev) * math.sin(azim),
-        100 * math.sin(elev),
-        100 * math.cos(elev) * math.cos(azim)
-    )
+    pos_vector = 100 * np.array([math.cos(elev) * math.sin(azim),
+                                 math.sin(elev),
+                                 math.cos(elev) * math.cos(azim)])
     
     # Create a perpendicular vector for the orbit plane
     # This is a simplified approach - real orbits would use actual orbital parameters
-    if abs(pos_vector.y) < 0.9:  # Not near poles
-        perp_vector = vector(pos_vector.z, 0, -pos_vector.x).norm()
+    if abs(pos_vector[1]) < 0.9:  # Not near poles
+        u = np.array([pos_vector[2], 0.0, -pos_vector[0]])
+        u /= np.linalg.norm(u)
     else:
-        perp_vector = vector(1, 0, 0)  # Default for near-polar positions
+        u = np.array([1.0, 0.0, 0.0])  # Default for near-polar positions
     
     # Create another perpendicular vector to form a plane
-    third_vector = cross(pos_vector, perp_vector).norm()
-    
-    # Create orbit points
-    for i in range(num_points + 1):
-        angle = i * 2 * math.pi / num_points
-        # Rotate around the position vector
-        point = 100 * (perp_vector * math.cos(angle) + third_vector * math.sin(angle))
-        orbit_points.append(point)
+    v = np.cross(pos_vector, u)
+    v /= np.linalg.norm(v)
+    return u, v
+
+def create_orbit_track(scene, slot, sat_data):
+    """Create a predicted orbit track for a satellite"""
+    # Create points for a simple circular orbit
+    # In a real implementation, you would use orbital mechanics and TLE data
+    # This is a simplified version that creates a circle on the celestial sphere
+    u, v = _orbit_basis(sat_data["elevation"], sat_data["azimuth"])
+    orbit_points = [vector(*point) for point in (100 * (_C * u + _S * v)).tolist()]
     
     # Create the orbit curve
     sat_type = sat_data.get("type", 0)
-    orbit_colors = {
-        0: vector(0.8, 0.4, 0.0, 0.5),  # GPS: orange with transparency
-        1: vector(0.0, 0.6, 0.8, 0.5),  # GLONASS: blue with transparency
-        2: vector(0.0, 0.8, 0.2, 0.5),  # GALILEO: green with transparency
-    }
-    orbit_color = orbit_colors.get(sat_type, vector(0.7, 0.7, 0.7, 0.5))
+    orbit_color = _ORBIT_COLOR[sat_type] if 0 <= sat_type < 3 else _DEFAULT_ORBIT_COLOR
     
     orbit_track = curve(pos=orbit_points, color=orbit_color, radius=0.5)
-    scene.orbit_tracks[sat_id] = orbit_track
+    orbit_track._build_angles = (sat_data["elevation"], sat_data["azimuth"])
+    scene._orbit_curves[slot] = orbit_track
 
-def update_orbit_track(scene, sat_id, sat_data):
-    """Update the orbit track for a satellite"""
-    # For this simplified implementation, we'll just ensure the track is visible
-    if sat_id in scene.orbit_tracks:
-        scene.orbit_tracks[sat_id].visible = True
-    else:
-        create_orbit_track(scene, sat_id, sat_data)
+def update_orbit_track(scene, slot, sat_data):
+    """Update the orbit track of the satellite in a slot"""
+    orbit_track = scene._orbit_curves[slot]
+    if orbit_track is None:
+        create_orbit_track(scene, slot, sat_data)
+        return
+    
+    if not orbit_track.visible:
+        orbit_track.visible = True
+    
+    # Only move the track once the satellite has drifted far enough to notice
+    elevation, azimuth = sat_data["elevation"], sat_data["azimuth"]
+    build_elev, build_az = orbit_track._build_angles
+    d_az = (azimuth - build_az + 180) % 360 - 180
+    if math.hypot(elevation - build_elev, d_az) < _ORBIT_REBUILD_DEG:
+        return
+    
+    u, v = _orbit_basis(elevation, azimuth)
+    for i, point in enumerate((100 * (_C * u + _S * v)).tolist()):
+        orbit_track.modify(i, pos=vector(*point))
+    orbit_track._build_angles = (elevation, azimuth)
 
-def run_yocto_gps(target, enable_3d=False):
+def run_yocto_gps(target, enable_3d=False, verbose=True):
     errmsg = YRefParam()
     if YAPI.RegisterHub("usb", errmsg) != YAPI.SUCCESS:
         die("Yocto-API init error: " + errmsg.value)
@@ -404,6 +540,9 @@ def run_yocto_gps(target, enable_3d=False):
     if enable_3d:
         scene = create_sky_display()
     
+    last_fix = None
+    rec_frame = None
+    
     while gps.isOnline():
         if gps.get_isFixed() != YGps.ISFIXED_TRUE:
             print("Waiting for GPS fix...")
@@ -415,48 +554,89 @@ def run_yocto_gps(target, enable_3d=False):
         alt = gps.get_altitude()
         print(f"Fixed position: Latitude={lat:.6f}°, Longitude={lon:.6f}°, Altitude={alt:.1f} m")
         
+        # Receiver frame only changes when the fix moves
+        if (lat, lon, alt) != last_fix:
+            rec_frame = _receiver_frame(lat, lon, alt)
+            last_fix = (lat, lon, alt)
+        
         nmea_messages = gps.get_nmeaMessages()
-        sat_angles = parse_gsv(nmea_messages)
+        sat_nums, elevations, azimuths, _snrs = parse_gsv(nmea_messages)
+        # Satellite number -> index in the GSV arrays (the latest report wins)
+        sat_index = {sat_num: j for j, sat_num in enumerate(sat_nums.tolist())}
         satCount = gps.get_satelliteCount()
         print(f"Satellites visible: {satCount}")
         
-        satellites_data = []
+        # Keep the satellites with known angles, then compute their positions in one batch for the report
+        visible = []
         for i in range(satCount):
             satInfo = gps.get_satelliteInfo(i)
+            j = sat_index.get(satInfo.get_satNumber())
+            if j is not None:
+                visible.append((i, satInfo, j))
+        
+        idx = np.array([v[2] for v in visible], dtype=np.intp)
+        if verbose:
+            lat_sats, lon_sats, alt_sats = satellite_positions_batch(rec_frame, elevations[idx], azimuths[idx])
+        elev_list, az_list = elevations[idx].tolist(), azimuths[idx].tolist()
+        
+        satellites_data = []
+        report = []
+        for k, (i, satInfo, _j) in enumerate(visible):
+            elevation_deg, azimuth_deg = elev_list[k], az_list[k]
             satType = satInfo.get_satType()
-            satTypeStr = {0: "GPS", 1: "GLONASS", 2: "GALILEO"}.get(satType, "UNKNOWN")
+            satTypeStr = _SAT_TYPE_NAME[satType] if 0 <= satType < 3 else "UNKNOWN"
             satID = satInfo.get_satNumber()
             signal = satInfo.get_signalStrength()
             used = satInfo.get_inUse()
             
-            elevation_deg, azimuth_deg = sat_angles.get(satID, (None, None))
-            if elevation_deg is not None and azimuth_deg is not None:
-                lat_sat, lon_sat, alt_sat = satellite_position(lat, lon, elevation_deg, azimuth_deg)
-                print(f"Satellite {i+1}: Type={satTypeStr} ID={satID} Signal={signal} UsedInFix={used}")
-                print(f" Elevation={elevation_deg}°, Azimuth={azimuth_deg}°")
-                print(f" Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m")
-                print("-----")
-                
-                satellites_data.append({
-                    "id": satID,
-                    "name": f"{satTypeStr}-{satID}",
-                    "type": satType,
-                    "elevation": elevation_deg,
-                    "azimuth": azimuth_deg,
-                    "signal": signal,
-                    "used": used == 1
-                })
+            if verbose:
+                lat_sat, lon_sat, alt_sat = lat_sats[k], lon_sats[k], alt_sats[k]
+                report.append(f"Satellite {i+1}: Type={satTypeStr} ID={satID} Signal={signal} UsedInFix={used}\n"
+                              f" Elevation={elevation_deg}°, Azimuth={azimuth_deg}°\n"
+                              f" Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m\n"
+                              "-----\n")
+            
+            satellites_data.append({
+                "id": satID,
+                "name": f"{satTypeStr}-{satID}",
+                "type": satType,
+                "elevation": elevation_deg,
+                "azimuth": azimuth_deg,
+                "signal": signal,
+                "used": used == 1
+            })
+        
+        # Whole satellite report in a single write
+        sys.stdout.write("".join(report))
         
         # Update 3D visualization
         if enable_3d and satellites_data:
+            t0 = time.perf_counter()
             update_satellites(scene, satellites_data)
-            rate(30)  # Limit to 30 FPS
+            # Limit to 30 FPS, unless the update already used the whole frame budget
+            if time.perf_counter() - t0 < _FRAME_TIME:
+                rate(30)
         
         YAPI.Sleep(5000)
     
     YAPI.FreeAPI()
 
-def run_system_gps(serial_port, baudrate=4800, enable_3d=False):
+def read_nmea_sentences(ser):
+    """Yield the NMEA sentences (bytes, surrounding whitespace stripped) received on a serial port"""
+    buf = bytearray()
+    while True:
+        # Sleep in select until bytes arrive (POSIX ports expose a file descriptor)
+        if os.name == 'posix' and not ser.in_waiting:
+            select.select([ser.fileno()], [], [], ser.timeout)
+        buf.extend(ser.read(max(1, ser.in_waiting)))
+        eol = buf.find(b'\n')
+        while eol >= 0:
+            sentence = bytes(buf[:eol]).strip()
+            del buf[:eol + 1]
+            yield sentence
+            eol = buf.find(b'\n')
+
+def run_system_gps(serial_port, baudrate=4800, enable_3d=False, verbose=True):
     import serial
     try:
         ser = serial.Serial(serial_port, baudrate, timeout=1)
@@ -467,6 +647,8 @@ def run_system_gps(serial_port, baudrate=4800, enable_3d=False):
     receiver_lat = None
     receiver_lon = None
     receiver_alt = None
+    last_fix = None
+    rec_frame = None
     sat_angles = {}
     
     # Initialize 3D visualization if enabled
@@ -475,50 +657,59 @@ def run_system_gps(serial_port, baudrate=4800, enable_3d=False):
         scene = create_sky_display()
     
     print("Reading system GPS NMEA sentences...")
+    sentences = read_nmea_sentences(ser)
     while True:
         try:
-            line = ser.readline().decode('ascii', errors='ignore').strip()
-            if not line:
-                continue
-            if not line.startswith('$'):
+            line = next(sentences)
+            if not line.startswith(b'$'):
                 continue
             
-            msg = pynmea2.parse(line)
-            
-            if isinstance(msg, pynmea2.GGA):
-                if msg.gps_qual > 0:
-                    receiver_lat = msg.latitude if msg.lat_dir == 'N' else -msg.latitude
-                    receiver_lon = msg.longitude if msg.lon_dir == 'E' else -msg.longitude
-                    receiver_alt = msg.altitude  # meters
-                    print(f"Fix: Lat={receiver_lat:.6f}, Lon={receiver_lon:.6f}, Alt={receiver_alt:.1f} m")
-                else:
-                    print("No GPS fix yet")
-            
-            elif isinstance(msg, pynmea2.GSV):
+            gsv = _GSV_BODY_RE.match(line)
+            gsv_cycle_done = False
+            if gsv:
+                # Fast path for the most frequent sentence, without pynmea2
+                if not nmea_checksum_ok(line):
+                    continue
+                
                 # Update satellite angles
-                for i in range(msg.num_sv_in_view):
-                    fields = line.split(',')
-                    # Satellite info starts at index 4, each satellite uses 4 fields
-                    for sat_idx in range(4):
-                        base_idx = 4 + sat_idx * 4
-                        if base_idx + 3 < len(fields):
-                            try:
-                                sat_num = int(fields[base_idx])
-                                elevation = int(fields[base_idx + 1])
-                                azimuth = int(fields[base_idx + 2])
-                                snr = int(fields[base_idx + 3]) if fields[base_idx + 3] else 0
-                                sat_angles[sat_num] = (elevation, azimuth, snr)
-                            except ValueError:
-                                pass
+                for sat_num, elevation, azimuth, snr in gsv_satellites(gsv.group(3)):
+                    sat_angles[sat_num] = (elevation, azimuth, snr)
+                
+                # Last message of a GSV cycle (message number == total messages)
+                gsv_cycle_done = int(gsv.group(2)) == int(gsv.group(1))
+            else:
+                msg = pynmea2.parse(line.decode('ascii', errors='ignore'))
+                
+                if isinstance(msg, pynmea2.GGA):
+                    if msg.gps_qual > 0:
+                        # pynmea2 latitude/longitude are already signed by hemisphere
+                        receiver_lat = msg.latitude
+                        receiver_lon = msg.longitude
+                        receiver_alt = msg.altitude or 0.0  # meters, the GGA altitude field may be empty
+                        if (receiver_lat, receiver_lon, receiver_alt) != last_fix:
+                            rec_frame = _receiver_frame(receiver_lat, receiver_lon, receiver_alt)
+                            last_fix = (receiver_lat, receiver_lon, receiver_alt)
+                        print(f"Fix: Lat={receiver_lat:.6f}, Lon={receiver_lon:.6f}, Alt={receiver_alt:.1f} m")
+                    else:
+                        print("No GPS fix yet")
             
-            if receiver_lat is not None and receiver_lon is not None and sat_angles:
+            # Report once per completed GSV cycle, when a fix is known
+            if gsv_cycle_done and receiver_lat is not None and receiver_lon is not None and sat_angles:
                 print(f"Satellites visible: {len(sat_angles)}")
                 satellites_data = []
+                report = []
                 
-                for sat_num, (elev, az, snr) in sat_angles.items():
-                    lat_sat, lon_sat, alt_sat = satellite_position(receiver_lat, receiver_lon, elev, az)
-                    print(f"Satellite {sat_num}: Elevation={elev}°, Azimuth={az}°, SNR={snr}")
-                    print(f" Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m")
+                if verbose:
+                    angles = list(sat_angles.values())
+                    lat_sats, lon_sats, alt_sats = satellite_positions_batch(rec_frame,
+                                                                             [a[0] for a in angles],
+                                                                             [a[1] for a in angles])
+                
+                for k, (sat_num, (elev, az, snr)) in enumerate(sat_angles.items()):
+                    if verbose:
+                        lat_sat, lon_sat, alt_sat = lat_sats[k], lon_sats[k], alt_sats[k]
+                        report.append(f"Satellite {sat_num}: Elevation={elev}°, Azimuth={az}°, SNR={snr}\n"
+                                      f" Approximate position: Lat={lat_sat:.6f}°, Lon={lon_sat:.6f}°, Alt={alt_sat*1000:.0f} m\n")
                     
                     # Determine satellite type based on ID range (simplified)
                     sat_type = 0  # Default to GPS
@@ -537,12 +728,16 @@ def run_system_gps(serial_port, baudrate=4800, enable_3d=False):
                         "used": False  # We don't know which are used from GSV alone
                     })
                 
+                # Whole satellite report in a single write
+                sys.stdout.write("".join(report))
+                
                 # Update 3D visualization
                 if enable_3d and satellites_data:
+                    t0 = time.perf_counter()
                     update_satellites(scene, satellites_data)
-                    rate(30)  # Limit to 30 FPS
-            
-            time.sleep(0.1)
+                    # Limit to 30 FPS, unless the update already used the whole frame budget
+                    if time.perf_counter() - t0 < _FRAME_TIME:
+                        rate(30)
         
         except pynmea2.ParseError:
             continue
@@ -555,6 +750,12 @@ def main():
     if enable_3d:
         sys.argv.remove('--3d')  # Remove 3D flag from arguments
     
+    # The per-satellite console report is skipped in 3D mode unless --verbose is given
+    verbose = '--verbose' in sys.argv
+    if verbose:
+        sys.argv.remove('--verbose')
+    verbose = verbose or not enable_3d
+    
     if len(sys.argv) < 2:
         usage()
     
@@ -563,7 +764,7 @@ def main():
             print("Please specify serial port for system GPS, e.g. /dev/ttyUSB0 or COM3")
             sys.exit(1)
         serial_port = sys.argv[2]
-        run_system_gps(serial_port, enable_3d=enable_3d)
+        run_system_gps(serial_port, enable_3d=enable_3d, verbose=verbose)
         return
     
     if not YOCTO_AVAILABLE:
@@ -572,7 +773,7 @@ def main():
     
     target = sys.argv[1]
     try:
-        run_yocto_gps(target, enable_3d=enable_3d)
+        run_yocto_gps(target, enable_3d=enable_3d, verbose=verbose)
     except Exception as e:
         print(f"Yocto-GPS error: {e}")
         print("Falling back to system GPS is recommended.")